@@ -11,10 +11,19 @@ import random
 import copy
 import json
 import requests
+import requests.adapters
 import re
 import pprint
 import argparse
 import sys
+import os
+import contextlib
+import cProfile
+import pstats
+import tracemalloc
+import threading
+import concurrent.futures
+import zlib
 import yaml
 
 # Simple encoder for the classes below
@@ -210,6 +219,7 @@ class CheckConfig:
         self.integrationIds = data['integrationIds']
         self.priority = data['priority']
         self.customMessage = data['customMessage']
+        self.pingdomAccount = site.get('pingdomAccount',None)
         self.tags = []
 
         self.applyPathPart(pathPart)
@@ -374,16 +384,145 @@ def toPOSTData(check):
 
 
 #
-# Loads the api token from a token file
+# Loads the api token from a token file. Token
+# files are only read once, then cached
 #
-def getApiToken(args):
-    
-    try:
-        with open(args.pingdom_api_token_file, 'r') as file:
-            return file.read().strip()
-    except Exception as e:
-        logging.exception("getApiToken() Error loading token [{}] = {}".format(args.pingdom_api_token_file,str(sys.exc_info()[:2])))
-        raise e
+apiTokens = {}
+apiTokensLock = threading.Lock()
+
+def getApiToken(tokenFile):
+
+    with apiTokensLock:
+        if tokenFile in apiTokens:
+            return apiTokens[tokenFile]
+
+        try:
+            with open(tokenFile, 'r') as file:
+                apiTokens[tokenFile] = file.read().strip()
+                return apiTokens[tokenFile]
+        except Exception as e:
+            logging.exception("getApiToken() Error loading token [{}] = {}".format(tokenFile,str(sys.exc_info()[:2])))
+            raise e
+
+#
+# Throttles the requests made with a single
+# pingdom API token to at most maxRequestsPerSecond,
+# a value of 0 means no throttling
+#
+class RateGovernor:
+    def __init__(self, maxRequestsPerSecond):
+        self.interval = 1.0 / maxRequestsPerSecond if maxRequestsPerSecond > 0 else 0
+        self.nextAllowed = 0
+        self.lock = threading.Lock()
+
+    # blocks until the caller is permitted to make a request
+    def acquire(self):
+        if not self.interval:
+            return
+
+        with self.lock:
+            now = time.monotonic()
+            wait = self.nextAllowed - now
+            self.nextAllowed = max(now,self.nextAllowed) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+#
+# A single Pingdom account (or sub-account) as
+# identified by one api token file. Each account
+# has its own RateGovernor and http connection pool
+#
+class PingdomAccount:
+    def __init__(self, name, tokenFile, maxRequestsPerSecond, connectionPoolSize):
+        self.name = name
+        self.tokenFile = tokenFile
+        self.governor = RateGovernor(maxRequestsPerSecond)
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=connectionPoolSize, pool_maxsize=connectionPoolSize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def getApiToken(self):
+        return getApiToken(self.tokenFile)
+
+    # Issues a request w/ this account's connection
+    # pool once permitted by its RateGovernor
+    def request(self, method, url, **kwargs):
+        self.governor.acquire()
+        return self.session.request(method, url, **kwargs)
+
+#
+# The set of PingdomAccounts declared via --pingdom-api-token-file
+# which is a comma delimited list of [accountName=]path/to/token.file
+# entries. The first entry is the default account.
+#
+# Generated checks are routed to an account by --token-routing:
+#
+#   site: the site's 'pingdomAccount' YAML property (which must name a
+#         token entry), otherwise the site's name, if no token entry
+#         has that name the default account is used
+#   hash: a stable hash of the check's url spread across all accounts
+#
+class TokenPool:
+    def __init__(self, args):
+        self.routing = args.token_routing
+        self.accounts = {}
+
+        if not args.pingdom_api_token_file:
+            raise Exception("TokenPool() --pingdom-api-token-file is required")
+
+        for entry in args.pingdom_api_token_file.split(","):
+            if entry.strip() == '':
+                continue
+
+            name,tokenFile = entry.split("=",1) if "=" in entry else (entry,entry)
+            name = name.strip()
+            tokenFile = tokenFile.strip()
+
+            if name == '' or tokenFile == '':
+                raise Exception("TokenPool() invalid --pingdom-api-token-file entry: '{}' expected [accountName=]path/to/token.file".format(entry))
+
+            if name in self.accounts:
+                raise Exception("TokenPool() duplicate --pingdom-api-token-file account name: {}".format(name))
+
+            self.accounts[name] = PingdomAccount(name,tokenFile, \
+                args.max_requests_per_second,args.connection_pool_size)
+
+            # read (and cache) every token up front so a bad
+            # token file fails before anything is sent
+            self.accounts[name].getApiToken()
+
+        if not self.accounts:
+            raise Exception("TokenPool() --pingdom-api-token-file contains no token file entries: '{}'".format(args.pingdom_api_token_file))
+
+        self.defaultAccount = list(self.accounts.values())[0]
+
+        logging.debug("TokenPool() accounts: {} routing: {}".format(list(self.accounts.keys()),self.routing))
+
+    def getAccounts(self):
+        return list(self.accounts.values())
+
+    # Returns the PingdomAccount a CheckConfig should be created in
+    def route(self, siteName, check):
+        if self.routing == 'hash':
+            key = "{}{}".format(check.baseUrl,check.path).encode('utf-8')
+            return self.getAccounts()[zlib.crc32(key) % len(self.accounts)]
+
+        if check.pingdomAccount:
+            if check.pingdomAccount not in self.accounts:
+                raise Exception("TokenPool.route() sites[{}].pingdomAccount: {} matches no --pingdom-api-token-file account: {}" \
+                    .format(siteName,check.pingdomAccount,list(self.accounts.keys())))
+            return self.accounts[check.pingdomAccount]
+
+        return self.accounts.get(siteName,self.defaultAccount)
+
+    # Invokes fn(account) for every given account in parallel
+    # (via the PhaseProfiler), returns a dict of account name -> fn result
+    def forEachAccount(self, fn, accounts, profiler):
+        results = profiler.map(fn, accounts, len(accounts))
+        return {a.name:result for a,result in zip(accounts,results)}
 
 #
 # Fetches a list of pingdom API check objects from
@@ -397,7 +536,7 @@ def getApiToken(args):
 # where ALL tagQualifiers must match in order for the
 # check to be returned
 #
-def getChecks(args,checkNames,tagQualifiers):
+def getChecks(args,account,checkNames,tagQualifiers):
 
     toReturn = []
     try:
@@ -423,26 +562,26 @@ def getChecks(args,checkNames,tagQualifiers):
             querystring["tags"] += (",".join(checkNames))
 
         headers = {
-            'Authorization': "Bearer {}".format(getApiToken(args)),
+            'Authorization': "Bearer {}".format(account.getApiToken()),
             'User-Agent': "github.com/bitsofinfo/pingdom-check-loader/1.0.0",
             'Accept': "*/*",
             'Accept-Encoding': "gzip, deflate",
             'Cache-Control': "no-cache"
         }
 
-        response = requests.request("GET", url, params=querystring, headers=headers)
+        response = account.request("GET", url, params=querystring, headers=headers)
 
         if response.status_code == 200:
 
             checks = response.json() # this is a dict!
 
             if len(checks['checks']) == 0:
-                logging.debug("GET checks OK: {} but found zero {} checks, nothing to do... CRITERIA={}" \
-                    .format(response.status_code,len(checks['checks']),querystring))
+                logging.debug("GET checks OK: [{}] {} but found zero {} checks, nothing to do... CRITERIA={}" \
+                    .format(account.name,response.status_code,len(checks['checks']),querystring))
                 return toReturn # zero
             
-            logging.debug("GET checks OK: {} found {} pre-qualified (tags ANY match) checks, CRITERIA={}" \
-                .format(response.status_code,len(checks['checks']),querystring))
+            logging.debug("GET checks OK: [{}] {} found {} pre-qualified (tags ANY match) checks, CRITERIA={}" \
+                .format(account.name,response.status_code,len(checks['checks']),querystring))
 
 
             # ok, tag_qualifiers is an AND, so we need to make sure
@@ -466,23 +605,58 @@ def getChecks(args,checkNames,tagQualifiers):
             return toReturn
 
         else:
-            msg = "GET checks FAILED: {} RESPONSE={} for CRITERIA={}".format(response.status_code,response.content,querystring)
+            msg = "GET checks FAILED: [{}] {} RESPONSE={} for CRITERIA={}".format(account.name,response.status_code,response.content,querystring)
+            logging.error(msg)
+            raise Exception(msg)
+
+    except Exception as e:
+        logging.exception("getChecks() error GETing checks from [{}]: ERROR={}" \
+            .format(account.name,str(sys.exc_info()[:2])))
+        raise e
+
+#
+# DELETEs the given check ids from a single PingdomAccount
+#
+def deleteAccountChecks(account,args,checkIdsToDelete):
+
+    try:
+        url = "{}/checks".format(args.pingdom_api_base_url)
+        
+        querystring = {"delcheckids":",".join(checkIdsToDelete)}
+
+        headers = {
+            'Authorization': "Bearer {}".format(account.getApiToken()),
+            'User-Agent': "github.com/bitsofinfo/pingdom-check-loader/1.0.0",
+            'Accept': "*/*",
+            'Accept-Encoding': "gzip, deflate",
+            'Cache-Control': "no-cache"
+        }
+
+        response = account.request("DELETE", url, params=querystring, headers=headers)
+
+        if response.status_code == 200:
+            logging.debug("DELETE checks OK: [{}] {} {} checks, CRITERIA={}" \
+                .format(account.name,response.status_code,len(checkIdsToDelete),querystring))
+
+        else:
+            msg = "DELETE checks FAILED: [{}] {} RESPONSE={} for CRITERIA={}".format(account.name,response.status_code,response.content,querystring)
             logging.error(msg)
             raise Exception(msg)
 
     except Exception as e:
-        logging.exception("getChecks() error GETing checks: ERROR={}" \
-            .format(str(sys.exc_info()[:2])))
+        logging.exception("deleteAccountChecks() error DELETEing checks from [{}] {}: ERROR={}" \
+            .format(account.name,checkIdsToDelete,str(sys.exc_info()[:2])))
         raise e
 
 #
-# Loads all qualifying checks from pingdom given
-# --check-names and/or --delete-tag-qualifiers and
-# prompts, then deletes them by check id
+# Loads all qualifying checks from every account in
+# the TokenPool given --check-names and/or
+# --delete-tag-qualifiers and prompts, then deletes
+# them by check id, all accounts in parallel
 #
-def deleteChecks(args,timestamp):
+def deleteChecks(args,timestamp,tokenPool,profiler):
 
-    checkIdsToDelete = []
+    checkIdsToDelete = {}
 
     # get all qualifiying checks
     try:
@@ -495,25 +669,28 @@ def deleteChecks(args,timestamp):
         if args.delete_tag_qualifiers:
             tagQualifiers = args.delete_tag_qualifiers.split(",")
 
-        pingdomChecks = getChecks(args,checkNames,tagQualifiers)
+        with profiler.phase("fetch"):
+            pingdomChecks = tokenPool.forEachAccount( \
+                lambda account : getChecks(args,account,checkNames,tagQualifiers), tokenPool.getAccounts(), profiler)
 
     except Exception as e:
         logging.exception("deleteChecks() error DELETing checks: ERROR={} CHECK_IDS={}" \
             .format(str(sys.exc_info()[:2]),checkIdsToDelete))
         raise e
 
+    # lets log them all + collect ids
+    for accountName,checks in pingdomChecks.items():
+        for check in checks:
+            logging.debug("deleteChecks() found: [{}] {} {} {} {}" \
+                .format(accountName,check['id'],check['hostname'],check['name'],list(map(lambda t : t['name'],check['tags']))))
+            checkIdsToDelete.setdefault(accountName,[]).append(str(check['id']))
+
     # fail fast if none
-    if len(pingdomChecks) == 0:
+    if len(checkIdsToDelete) == 0:
         logging.info("deleteChecks() no matching pingdom checks found for --check-names (ANY tag match) {} + --delete-tag-qualifiers (all tags MUST MATCH) {}" \
             .format(args.check_names,args.delete_tag_qualifiers)) 
         return
 
-    # lets log them all + collect ids
-    for check in pingdomChecks:
-        logging.debug("deleteChecks() found: {} {} {} {}" \
-            .format(check['id'],check['hostname'],check['name'],list(map(lambda t : t['name'],check['tags']))))
-        checkIdsToDelete.append(str(check['id']))
-
     # warn the user
     time.sleep(1) # for docker lag
     proceed = input("\n\nYou are about to DELETE the above checks in Pingdom: do you want to proceed?: (y|n):").strip()
@@ -522,43 +699,82 @@ def deleteChecks(args,timestamp):
         sys.exit(1)
 
     # ok lets do the actual delete
+    with profiler.phase("delete"):
+        tokenPool.forEachAccount( \
+            lambda account : deleteAccountChecks(account,args,checkIdsToDelete[account.name]), \
+            [a for a in tokenPool.getAccounts() if a.name in checkIdsToDelete], profiler)
+    
+
+#
+# POSTs a single CheckConfig to a PingdomAccount.
+# Returns True if created
+#
+def createCheck(account,args,apiToken,check):
+
+    postData = None
+
     try:
         url = "{}/checks".format(args.pingdom_api_base_url)
-        
-        querystring = {"delcheckids":",".join(checkIdsToDelete)}
 
         headers = {
-            'Authorization': "Bearer {}".format(getApiToken(args)),
+            'Content-Type': "application/x-www-form-urlencoded",
+            'Authorization': "Bearer {}".format(apiToken),
             'User-Agent': "github.com/bitsofinfo/pingdom-check-loader/1.0.0",
             'Accept': "*/*",
-            'Accept-Encoding': "gzip, deflate",
             'Cache-Control': "no-cache"
         }
-
-        response = requests.request("DELETE", url, params=querystring, headers=headers)
-
+        postData = toPOSTData(check)
+        response = account.request("POST", url, data=postData, headers=headers)
+        
         if response.status_code == 200:
-            logging.debug("DELETE checks OK: {} {} checks, CRITERIA={}" \
-                .format(response.status_code,len(checkIdsToDelete),querystring))
-
+            logging.debug("Check created OK: [{}] {} RESPONSE={} for CHECK={}".format(account.name,response.status_code,response.content,check.summary()))
+            return True
         else:
-            msg = "DELETE checks FAILED: {} RESPONSE={} for CRITERIA={}".format(response.status_code,response.content,querystring)
-            logging.error(msg)
-            raise Exception(msg)
+            logging.error("Check create FAILED: [{}] {} RESPONSE={} for CHECK={}".format(account.name,response.status_code,response.content,check.summary()))
 
     except Exception as e:
-        logging.exception("deleteChecks() error DELETEing checks {}: ERROR={}" \
-            .format(checkIdsToDelete,str(sys.exc_info()[:2])))
-        raise e
-    
+        logging.exception("createCheck() error POSTing check to [{}]: POST-DATA={} ERROR={} CHECK={}" \
+            .format(account.name,postData,str(sys.exc_info()[:2]),check.summary()))
 
+    return False
+
+#
+# POSTs the given CheckConfigs to a single PingdomAccount,
+# --connection-pool-size at a time, paced by the account's
+# RateGovernor. Returns a tuple of (created,failed) counts
+#
+def createAccountChecks(account,args,checks,profiler):
+
+    apiToken = account.getApiToken()
+
+    logging.debug("Transmitting new pingdom checks ({}) to: [{}]".format(len(checks),account.name))
+
+    results = profiler.map( \
+        lambda check : createCheck(account,args,apiToken,check), checks, args.connection_pool_size)
+
+    created = results.count(True)
+    return (created,len(results) - created)
 
 #
 # Consumes the YAML config, generates a set of 
 # checks to be sent to pingdom. Prompts then 
-# creates the checks in pingdome using the API
+# creates the checks in pingdome using the API,
+# routing each check to a TokenPool account and
+# transmitting to all accounts in parallel
 #
-def createChecks(args,timestamp,generatedChecks):
+def createChecks(args,timestamp,generatedChecks,tokenPool,profiler):
+
+    # route every check to its account, before
+    # prompting so routing errors fail fast
+    accountChecks = {}
+    for siteName,checkNames in generatedChecks.items():
+        for checkName,checks in checkNames.items():
+            for check in checks:
+                account = tokenPool.route(siteName,check)
+                accountChecks.setdefault(account.name,[]).append(check)
+
+    for accountName,checks in accountChecks.items():
+        logging.debug("createChecks() routed {} checks to: [{}]".format(len(checks),accountName))
 
     time.sleep(1) # for docker lag
     proceed = input("\n\nYou are about to CREATE the above checks in Pingdom. --dump-generated-checks for more details: do you want to proceed?: (y|n):").strip()
@@ -566,44 +782,213 @@ def createChecks(args,timestamp,generatedChecks):
         logging.debug("Exiting, confirmation prompt input was: " + proceed)
         sys.exit(1)
 
-    apiToken = getApiToken(args)
-    created = 0
-    failed = 0
+    with profiler.phase("create"):
+        results = tokenPool.forEachAccount( \
+            lambda account : createAccountChecks(account,args,accountChecks[account.name],profiler), \
+            [a for a in tokenPool.getAccounts() if a.name in accountChecks], profiler)
 
-    for siteName,checkNames in generatedChecks.items():
-        for checkName,checks in checkNames.items():
-            logging.debug("Transmitting new pingdom checks ({}) for: {}.{}".format(len(checks),siteName,checkName))
+    created = sum(r[0] for r in results.values())
+    failed = sum(r[1] for r in results.values())
 
-            for check in checks:
+    logging.debug("createChecks() completed, {} checks created, {} failed at Pingdom w/ tag: {}".format(created,failed,timestamp))
 
-                postData = None
 
-                try:
-                    url = "{}/checks".format(args.pingdom_api_base_url)
+#
+# Optional --profile support. Wraps each phase of a run
+# (generate, fetch, create, delete) in cProfile + tracemalloc
+# and writes, per phase, into --profile-dir:
+#
+#   <timestamp>-<phase>.pstats       (cProfile stats, load w/ pstats/snakeviz)
+#   <timestamp>-<phase>.allocs.txt   (top tracemalloc allocation sites)
+#   <timestamp>-<phase>.collapsed    (collapsed stacks for flamegraph.pl/speedscope,
+#                                     approximated from cProfile caller edges)
+#
+# When --profile is not set phase() is a no-op
+#
+class PhaseProfiler:
 
-                    headers = {
-                        'Content-Type': "application/x-www-form-urlencoded",
-                        'Authorization': "Bearer {}".format(apiToken),
-                        'User-Agent': "github.com/bitsofinfo/pingdom-check-loader/1.0.0",
-                        'Accept': "*/*",
-                        'Cache-Control': "no-cache"
-                    }
-                    postData = toPOSTData(check)
-                    response = requests.request("POST", url, data=postData, headers=headers)
-                    
-                    if response.status_code == 200:
-                        created += 1
-                        logging.debug("Check created OK: {} RESPONSE={} for CHECK={}".format(response.status_code,response.content,check.summary()))
+    TOP_ALLOCATIONS = 25
+
+    # a stack's time is not split across callers below this (microseconds),
+    # smaller shares are folded into the stack's largest caller
+    MIN_STACK_WEIGHT = 100
+
+    # max depth of any collapsed stack
+    MAX_STACK_DEPTH = 64
+
+    def __init__(self, enabled, profileDir, timestamp):
+        self.enabled = enabled
+        self.profileDir = profileDir
+        self.timestamp = timestamp
+        self.threadProfiles = []
+        self.warnedSerial = False
+        self.lock = threading.Lock()
+
+        if self.enabled and not os.path.isdir(self.profileDir):
+            os.makedirs(self.profileDir)
+
+    @contextlib.contextmanager
+    def phase(self, phaseName):
+        if not self.enabled:
+            yield
+            return
+
+        logging.debug("PhaseProfiler profiling phase: {}".format(phaseName))
+
+        self.threadProfiles = []
+        profile = cProfile.Profile()
+        tracemalloc.start()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.write(phaseName,profile,snapshot)
+
+    # Before python 3.12 cProfile only sees the thread that
+    # enabled it, so work fanned out to other threads during
+    # a phase must be wrapped to be included in the phase's
+    # profile. From 3.12 cProfile uses sys.monitoring which
+    # only permits one profiler and records every thread's
+    # calls onto one call stack, so per thread profiles are
+    # not possible and map() runs serially instead
+    def wrap(self, fn):
+        if not self.enabled or sys.version_info >= (3, 12):
+            return fn
+
+        def profiled(*args):
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                return fn(*args)
+            finally:
+                profile.disable()
+                with self.lock:
+                    self.threadProfiles.append(profile)
+
+        return profiled
+
+    # Returns [fn(item) for item in items] run on up to
+    # maxWorkers threads. When profiling on python 3.12+
+    # items are run serially on the calling thread so
+    # the phase's profile is accurate (see wrap())
+    def map(self, fn, items, maxWorkers):
+        if not items:
+            return []
+
+        if self.enabled and sys.version_info >= (3, 12):
+            if not self.warnedSerial:
+                self.warnedSerial = True
+                logging.warning("PhaseProfiler --profile on python 3.12+ runs accounts and " + \
+                    "requests serially, not in parallel, so phase profiles are accurate")
+            return [fn(item) for item in items]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            return list(executor.map(self.wrap(fn), items))
+
+    def getFilePath(self, phaseName, extension):
+        return os.path.join(self.profileDir,"{}-{}.{}".format(self.timestamp,phaseName,extension))
+
+    # Writes the pstats, allocation and collapsed stack
+    # files for the given phase
+    def write(self, phaseName, profile, snapshot):
+        try:
+            stats = pstats.Stats(profile)
+            for threadProfile in self.threadProfiles:
+                stats.add(threadProfile)
+
+            pstatsFile = self.getFilePath(phaseName,"pstats")
+            stats.dump_stats(pstatsFile)
+
+            allocsFile = self.getFilePath(phaseName,"allocs.txt")
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, contextlib.__file__)))
+            with open(allocsFile, 'w') as file:
+                file.write("run identifier: {} phase: {}\n".format(self.timestamp,phaseName))
+                for stat in snapshot.statistics('lineno')[:PhaseProfiler.TOP_ALLOCATIONS]:
+                    file.write("{}\n".format(stat))
+
+            collapsedFile = self.getFilePath(phaseName,"collapsed")
+            with open(collapsedFile, 'w') as file:
+                for stack,weight in sorted(self.toCollapsedStacks(stats.stats).items()):
+                    file.write("{} {}\n".format(stack,weight))
+
+            logging.info("PhaseProfiler phase: {} profiles written: {} {} {}".format(phaseName,pstatsFile,allocsFile,collapsedFile))
+
+        except Exception as e:
+            logging.exception("PhaseProfiler.write() error writing profiles for phase: {} ERROR={}" \
+                .format(phaseName,str(sys.exc_info()[:2])))
+
+    # cProfile only records caller->callee edges, not full stacks,
+    # so each function's own time is walked up through its callers,
+    # split proportionally by each caller edge's cumulative time.
+    # This is an approximation rebuilt from caller edges, not sampled
+    # stacks. Returns a dict of "root;...;leaf" -> weight (microseconds)
+    def toCollapsedStacks(self, rawStats):
+        collapsed = {}
+
+        # file paths are shortened relative to sys.path
+        prefixes = sorted([os.path.join(p,"") for p in sys.path if p],key=len,reverse=True)
+
+        def label(func):
+            filename,lineno,name = func
+            for prefix in prefixes:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix):]
+                    break
+            return pstats.func_std_string((filename,lineno,name)).replace(";",":").replace(" ","_")
+
+        # Returns {caller:edge cumulative time} for the callers of func not
+        # already on the stack. Callers that are on the stack (recursion,
+        # i.e. deepcopy or yaml composing) are skipped through to their own
+        # callers so the walk continues up to the real root
+        def getCallers(func, stack):
+            callers = {}
+            pending = [func]
+            visited = set(pending)
+            while pending:
+                for c,edge in rawStats[pending.pop()][4].items():
+                    if c not in rawStats:
+                        continue
+                    if c in stack:
+                        if c not in visited:
+                            visited.add(c)
+                            pending.append(c)
                     else:
-                        failed != 1
-                        logging.error("Check create FAILED: {} RESPONSE={} for CHECK={}".format(response.status_code,response.content,response,check.summary()))
+                        callers[c] = callers.get(c,0) + edge[3]
+            return callers
 
-                except Exception as e:
-                    failed += 1
-                    logging.exception("createChecks() error POSTing check: POST-DATA={} ERROR={} CHECK={}" \
-                        .format(postData,str(sys.exc_info()[:2]),check.summary()))
+        def walk(func, weight, stack):
+            callers = getCallers(func, stack)
 
-    logging.debug("createChecks() completed, {} checks created, {} failed at Pingdom w/ tag: {}".format(created,failed,timestamp))
+            if not callers or len(stack) >= PhaseProfiler.MAX_STACK_DEPTH:
+                # the PhaseProfiler's own teardown (profile.disable()
+                # via contextlib) is not part of the profiled phase
+                if stack[-1][0] == contextlib.__file__:
+                    return
+                key = ";".join(map(label,reversed(stack)))
+                collapsed[key] = collapsed.get(key,0) + weight
+                return
+
+            total = sum(callers.values())
+            shares = {c:(weight * (ct / total) if total > 0 else weight / len(callers)) for c,ct in callers.items()}
+
+            largest = max(shares,key=shares.get)
+            for c,share in list(shares.items()):
+                if c != largest and share < PhaseProfiler.MIN_STACK_WEIGHT:
+                    shares[largest] += shares.pop(c)
+
+            for c,share in shares.items():
+                walk(c, share, stack + [c])
+
+        for func,(cc,nc,tt,ct,callers) in rawStats.items():
+            if tt > 0:
+                walk(func, tt * 1000000, [func])
+
+        return {stack:int(round(weight)) for stack,weight in collapsed.items() if round(weight) > 0}
 
 
 #
@@ -615,19 +1000,22 @@ def exec(args):
     timestamp = datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S%f')[:-4]
 
     try:
+        profiler = PhaseProfiler(args.profile,args.profile_dir,timestamp)
+
         # are we deleting?
         if args.delete_in_pingdom:
-            deleteChecks(args,timestamp)
+            deleteChecks(args,timestamp,TokenPool(args),profiler)
         
         # we are just creating/generating
         else:
             # pre-compute generated checks to potentially
             # be created...
-            generatedChecks = generateChecks(args,timestamp)
+            with profiler.phase("generate"):
+                generatedChecks = generateChecks(args,timestamp)
 
             # optionally create
             if args.create_in_pingdom:
-                createChecks(args,timestamp,generatedChecks)
+                createChecks(args,timestamp,generatedChecks,TokenPool(args),profiler)
 
     except Exception as e:
         logging.exception("Unexpected general error = " + str(sys.exc_info()[:2]))
@@ -650,7 +1038,15 @@ def main():
     parser.add_argument('-u', '--pingdom-api-base-url', dest='pingdom_api_base_url', \
         help="The Pingdom API base URL (inclusive of version)", default="https://api.pingdom.com/api/3.1")
     parser.add_argument('-t', '--pingdom-api-token-file', dest='pingdom_api_token_file', \
-        help="Path to a file that contains an valid pingdom API token", default=None)
+        help="Path to a file that contains an valid pingdom API token. Multiple accounts can be used " + \
+        " via a comma delimited list of [accountName=]path/to/token.file entries, the first being the default account", default=None)
+    parser.add_argument('-r', '--token-routing', dest='token_routing', default="site", choices=['site','hash'], \
+        help="How generated checks are routed to --pingdom-api-token-file accounts. 'site' = the site's 'pingdomAccount' " + \
+        " YAML property or site name (else the default account), 'hash' = stable hash of the check url across all accounts")
+    parser.add_argument('-m', '--max-requests-per-second', dest='max_requests_per_second', type=float, default=0, \
+        help="Max Pingdom API requests per second, per account/token. 0 = unlimited")
+    parser.add_argument('-n', '--connection-pool-size', dest='connection_pool_size', type=int, default=10, \
+        help="Max concurrent Pingdom API requests (and HTTP connection pool size), per account/token")
     parser.add_argument('-d', '--dump-generated-checks', action='store_true', default=False, \
         help="Dumps all generated checks to STDOUT")
     parser.add_argument('-x', '--create-in-pingdom', action='store_true', default=False, \
@@ -665,6 +1061,11 @@ def main():
         help="log level, DEBUG, INFO, etc")
     parser.add_argument('-b', '--log-file', dest='log_file', default=None, \
         help="Path to log file; default None = STDOUT")
+    parser.add_argument('-p', '--profile', action='store_true', default=False, \
+        help="Profile each phase of the run (generate, fetch, create, delete) w/ cProfile + tracemalloc. " + \
+        " Writes <run identifier>-<phase>.pstats, .allocs.txt and .collapsed (flame graph) files to --profile-dir")
+    parser.add_argument('-P', '--profile-dir', dest='profile_dir', default=".", \
+        help="Directory to write --profile output files to")
 
     args = parser.parse_args()
 